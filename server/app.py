@@ -1,8 +1,10 @@
 
 from __future__ import annotations
-import io, os
+import asyncio, io, os, unicodedata
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import NamedTuple, Optional
+from urllib.parse import quote
 
 from fastapi import FastAPI, Form
 from fastapi.responses import Response, RedirectResponse
@@ -10,14 +12,14 @@ from fastapi.staticfiles import StaticFiles
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_RIGHT, TA_CENTER
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
 from reportlab.lib import colors
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus.doctemplate import LayoutError
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
 import arabic_reshaper
+import uharfbuzz as hb
 from bidi.algorithm import get_display
 
 # --- مسارات المشروع ---
@@ -30,26 +32,167 @@ FONTS_DIR = os.path.join(BASE_DIR, "fonts")
 FONT_REGULAR_PATH = os.path.join(FONTS_DIR, "Tajawal-Medium.ttf")
 FONT_BOLD_PATH    = os.path.join(FONTS_DIR, "Tajawal-Bold.ttf")  # إن لم يوجد سيُستخدم Regular
 
+# --- تخطيط الصفحة ---
+_MARGIN     = 15*mm
+_TOP_MARGIN = 55*mm
+_BOT_MARGIN = 25*mm
+_HDR_X      = A4[0] - _MARGIN          # حافة النص اليمنى للترويسة والتذييل
+_HDR_TOP    = A4[1] - _MARGIN
+_FOOTER_Y   = _MARGIN + 8*mm
+# منطقة المحتوى (هوامش + حشوة 6 نقاط كما في إطار Platypus الافتراضي)
+_BODY_TOP    = A4[1] - _TOP_MARGIN - 6
+_BODY_BOTTOM = _BOT_MARGIN + 6
+_BODY_RIGHT  = A4[0] - _MARGIN - 6
+_BODY_CX     = A4[0] / 2
+# العنوان
+_TITLE_SIZE, _TITLE_LEADING, _TITLE_SPACE_AFTER = 16, 22, 8
+# فراغات عمودية بين عناصر التقرير
+_GAP_S, _GAP_M, _GAP_L = 4*mm, 6*mm, 8*mm
+
 # --- FastAPI & Static ---
 app = FastAPI(title="ReportLab A4 RTL PDF Generator — Sun–Tue")
 app.mount("/static", StaticFiles(directory=STATIC_DIR, html=True), name="static")
 
 # ---------------- RTL helpers ---------------- #
-try:
-    reshaper = arabic_reshaper.ArabicReshaper(
-        arabic_reshaper.config_for_true_type_font(FONT_REGULAR_PATH)
-    )
-except Exception:
-    # إن لم يتوفّر ملف الخط عند بدء التشغيل
-    reshaper = arabic_reshaper.ArabicReshaper({})
-
+# التشكيل عبر HarfBuzz بقواعد GSUB في الخط نفسه؛ الخط إلزامي، وغيابه يوقف التشغيل
+_HB_FACE = hb.Face(hb.Blob.from_file_path(FONT_REGULAR_PATH))
+_HB_FONT = hb.Font(_HB_FACE)
+# arabic_reshaper للنصوص التي لا يطابق فيها HarfBuzz نتيجته (انظر _HB_CHARS)
+_RESHAPER = arabic_reshaper.ArabicReshaper(
+    arabic_reshaper.config_for_true_type_font(FONT_REGULAR_PATH)
+)
+# الحركات تُحذف قبل التشكيل (ReportLab لا يضع العلامات فوق الحروف)، بنطاقات arabic_reshaper نفسها:
+# رموز مثل ۝ ۞ ۩ ضمن كتلة علامات القرآن تبقى نصّاً
+_HARAKAT_RE = arabic_reshaper.arabic_reshaper.HARAKAT_RE
+# محارف الخط عدا العلامات المركّبة، مع فواصل لا تصل الحروف؛ غيرها (حروف فارسية ليست في الخط،
+# علامات، ZWJ) يفصّله arabic_reshaper بطريقته الخاصة، فيُترك له
+_HB_CHARS = frozenset(
+    chr(c) for c in _HB_FACE.unicodes if unicodedata.category(chr(c)) not in ("Mn", "Me")
+) | frozenset("\n\u200b\u200c")
+
+
+def _hb_shape(s: str) -> list:
+    """رسوم HarfBuzz بالترتيب المنطقي؛ لكل محرف عنقوده (cluster) الخاص عدا الليغاتشر."""
+    buf = hb.Buffer()
+    buf.add_str(s)
+    buf.direction, buf.script, buf.language = "rtl", "Arab", "ar"
+    buf.cluster_level = hb.BufferClusterLevel.MONOTONE_CHARACTERS
+    hb.shape(_HB_FONT, buf, {"kern": False})
+    return buf.glyph_infos[::-1]
+
+
+# رقم الرسم → شكل العرض (U+FB50–U+FEFF) الذي يرسمه ReportLab كنص. يُبنى من مخرجات GSUB:
+# يُشكَّل كل شكل عرض في سياق تطويل يفرض صيغته، ويُربط الرسم الناتج بنقطته. الحرف المنفصل
+# يبقى على النص الأصلي كما في arabic_reshaper.
+_HB_GLYPH_TO_FORM: dict[int, str] = {}
+# ليغاتشرات في cmap الخط لا يركّبها GSUB (ي+ى، ي+ي): تسلسل الأشكال المنفردة → الليغاتشر
+_HB_LIGATURES: dict[str, str] = {}
+_FORM_CONTEXT = {"<isolated>": ("", ""), "<initial>": ("", "ـ"), "<medial>": ("ـ", "ـ"), "<final>": ("ـ", "")}
+
+
+def _probe_forms(ligatures: bool) -> None:
+    for cp in range(0xFB50, 0xFF00):
+        tag, *letters = unicodedata.decomposition(chr(cp)).split() or ("",)
+        letters = "".join(chr(int(x, 16)) for x in letters)
+        if (tag not in _FORM_CONTEXT or (len(letters) > 1) != ligatures
+                or (tag == "<isolated>" and len(letters) == 1)
+                or not all(ord(ch) in _HB_FACE.unicodes for ch in letters)):
+            continue
+        pre, post = _FORM_CONTEXT[tag]
+        glyphs = [g for g in _hb_shape(pre + letters + post)
+                  if len(pre) <= g.cluster < len(pre) + len(letters)]
+        if len(glyphs) == 1 and glyphs[0].cluster == len(pre) and glyphs[0].codepoint:
+            _HB_GLYPH_TO_FORM.setdefault(glyphs[0].codepoint, chr(cp))
+        elif ligatures and cp in _HB_FACE.unicodes and len(glyphs) == len(letters):
+            seq = "".join(_HB_GLYPH_TO_FORM.get(g.codepoint, ch) for g, ch in zip(glyphs, letters))
+            _HB_LIGATURES.setdefault(seq, chr(cp))
+
+
+_probe_forms(ligatures=False)   # الأشكال المنفردة أولاً: تسلسلات الليغاتشر تُبنى منها
+_probe_forms(ligatures=True)
+
+
+def reshape(text: str) -> str:
+    """يحوّل الحروف العربية إلى أشكال العرض المتّصلة (بالترتيب المنطقي)، دون bidi."""
+    s = _HARAKAT_RE.sub("", text)
+    if not _HB_CHARS.issuperset(s):
+        return _RESHAPER.reshape(text)
+    glyphs = _hb_shape(s)
+    out = []
+    # لكل عنقود: شكل العرض إن كان رسماً واحداً معروفاً، وإلا نصّه الأصلي مرّة واحدة
+    # (أرقام، أقواس تُعكس لاحقاً في bidi، فراغات…)
+    for i, g in enumerate(glyphs):
+        if i and glyphs[i - 1].cluster == g.cluster:
+            continue
+        j = i + 1
+        while j < len(glyphs) and glyphs[j].cluster == g.cluster:
+            j += 1
+        end = glyphs[j].cluster if j < len(glyphs) else len(s)
+        form = _HB_GLYPH_TO_FORM.get(g.codepoint) if j == i + 1 else None
+        out.append(form or s[g.cluster:end])
+    out = "".join(out)
+    for seq, lig in _HB_LIGATURES.items():
+        if seq in out:
+            out = out.replace(seq, lig)
+    return out
+
+
+@lru_cache(maxsize=4096)
 def rtl(text: str) -> str:
-    if text is None:
+    """تشكيل + bidi؛ محفوظ لكل نص فريد (الحدّ الأقصى يمنع نمو الذاكرة مع مدخلات المستخدم)."""
+    if not text:
         return ""
-    return get_display(reshaper.reshape(str(text)))
+    s = str(text)
+    if s.isascii() or s.isspace():
+        # لا حروف عربية: التشكيل و bidi لا يغيّران شيئاً (أرقام، تواريخ، لاتيني، فراغات)
+        return s
+    return get_display(reshape(s))
+
+
+# فاصل لا يظهر في مدخلات النماذج، ولا يتّصل بالحروف العربية عند التشكيل
+_BATCH_SEP = "\u200b|\u200b"
+
+@lru_cache(maxsize=1024)
+def rtl_many(*texts: str) -> tuple[str, ...]:
+    """مثل rtl لعدّة حقول معاً: استدعاء reshape واحد على النص المدموج ثم bidi لكل حقل.
+    (get_display على النص المدموج يعكس ترتيب الحقول ويخلط الاتجاهات بينها، لذا يبقى منفصلاً.)"""
+    out = [str(t) if t else "" for t in texts]
+    idx = [i for i, t in enumerate(out) if not (t.isascii() or t.isspace())]
+    joined = _BATCH_SEP.join(out[i] for i in idx)
+    # arabic_reshaper (بديل reshape) يشكّل عبر الفاصل، فالدمج لمسار HarfBuzz وحده
+    if (len(idx) < 2 or any(_BATCH_SEP in out[i] for i in idx)
+            or not _HB_CHARS.issuperset(_HARAKAT_RE.sub("", joined))):
+        return tuple(rtl(t) for t in out)
+    shaped = reshape(joined).split(_BATCH_SEP)
+    if len(shaped) != len(idx):
+        return tuple(rtl(t) for t in out)
+    for i, t in zip(idx, shaped):
+        out[i] = get_display(t)
+    return tuple(out)
+
+# ---------------- Static labels (reshaped once) ---------------- #
+
+_HDR_RIGHT_RTL = [rtl(s) for s in (
+    "وزارة التعليم",
+    "الإدارة العامة للتعليم بمكة المكرمة",
+    "مكتب تعليم العوالي",
+    "ابتدائية أم منيع الأنصارية",
+)]
+_FOOTER_RTL = rtl("مديرة المدرسة / ابتسام القرني")
+_TITLE_RTL = rtl("تقرير الجولات الإدارية عبر منصة مدرستي")
+_ADMIN_NAME_RTL = rtl("ابتسام قاسم الفيفي")
+
+# العناوين بترتيب العرض (يسار ← يمين)
+_FIELDS_HEADERS_RTL = [rtl(s) for s in ("الفصل الدراسي", "الأسبوع", "الحصة", "اسم الإدارية")]
+_DATE_LABEL_RTL = rtl("التاريخ")
+_VISIT_HEADERS_RTL = [rtl(s) for s in ("ملاحظات", "متابعة الجولة", "الفصل", "اليوم")]
+
+# الأحد، الإثنين، الثلاثاء
+_DAYS_RTL = [rtl(d) for d in ("الأحد", "الإثنين", "الثلاثاء")]
 
 
 def ensure_fonts(regular_path: str, bold_path: Optional[str]) -> tuple[str, str]:
+    """يسجّل الخطوط ويُعيد اسميها؛ يُستدعى مرة واحدة عند الاستيراد (FONT_REGULAR/FONT_BOLD)."""
     if not os.path.exists(regular_path):
         raise FileNotFoundError(
             f"لم يتم العثور على الخط: {regular_path}. ضع ملفات TTF في server/fonts."
@@ -67,163 +210,249 @@ def ensure_fonts(regular_path: str, bold_path: Optional[str]) -> tuple[str, str]
         bold_name = regular_name
     return regular_name, bold_name
 
-# ---------------- Header/Footer ---------------- #
+# تسجيل الخطوط عند الاستيراد (إلزامي)
+FONT_REGULAR, FONT_BOLD = ensure_fonts(FONT_REGULAR_PATH, FONT_BOLD_PATH)
+
+
+@lru_cache(maxsize=4096)
+def _text_width(text: str, font_name: str, size: float) -> float:
+    """عرض النص بالنقاط؛ محفوظ لأن drawRightString يمرّ على حروف النص في كل رسم."""
+    return pdfmetrics.stringWidth(text, font_name, size)
 
-def draw_header_footer(canvas, doc_obj, font_regular):
-    page_w, page_h = A4
-    margin = 15 * mm
-    top = page_h - margin
+# تسخين عروض النصوص الثابتة المرسومة في كل صفحة/جدول
+for _s in _HDR_RIGHT_RTL:
+    _text_width(_s, FONT_REGULAR, 11)
+_text_width(_FOOTER_RTL, FONT_REGULAR, 12)
+_text_width(_TITLE_RTL, FONT_BOLD, 16)
+for _s in (*_FIELDS_HEADERS_RTL, *_VISIT_HEADERS_RTL, *_DAYS_RTL, _DATE_LABEL_RTL, _ADMIN_NAME_RTL):
+    _text_width(_s, FONT_REGULAR, 11)
 
+# ---------------- Header/Footer ---------------- #
+
+def draw_header_footer(canvas, font_regular):
     canvas.setFont(font_regular, 11)
-    lines = [
-        "وزارة التعليم",
-        "الإدارة العامة للتعليم بمكة المكرمة",
-        "مكتب تعليم العوالي",
-        "ابتدائية أم منيع الأنصارية",
-    ]
-    y = top
-    for ln in lines:
-        canvas.drawRightString(page_w - margin, y, rtl(ln))
+    y = _HDR_TOP
+    for ln in _HDR_RIGHT_RTL:
+        canvas.drawString(_HDR_X - _text_width(ln, font_regular, 11), y, ln)
         y -= 13
 
     # تذييل ثابت
     canvas.setFont(font_regular, 12)
-    footer_y = margin + 8 * mm
-    canvas.drawRightString(page_w - margin, footer_y, rtl("مديرة المدرسة / ابتسام القرني"))
+    canvas.drawString(_HDR_X - _text_width(_FOOTER_RTL, font_regular, 12), _FOOTER_Y, _FOOTER_RTL)
 
 # ---------------- Dates: Sunday → Tuesday ---------------- #
 
-def current_week_sun_mon_tue():
+def _fmt_date(d: datetime) -> str:
+    # أسرع من strftime("%Y/%m/%d")
+    return f"{d.year:04d}/{d.month:02d}/{d.day:02d}"
+
+
+def current_week_sun_mon_tue(today: Optional[datetime] = None):
     """يُعيد تاريخ الأحد/الإثنين/الثلاثاء للأسبوع الحالي (أقرب أحد ماضٍ أو اليوم نفسه)."""
-    today = datetime.now()
+    if today is None:
+        today = datetime.now()
     # weekday(): الإثنين=0 .. الأحد=6  → نريد الأحد = 6
     diff_to_sun = (today.weekday() - 6) % 7
     sun = today - timedelta(days=diff_to_sun)
     mon = sun + timedelta(days=1)
     tue = sun + timedelta(days=2)
-    fmt = lambda d: d.strftime("%Y/%m/%d")
-    return fmt(sun), fmt(mon), fmt(tue)
+    return _fmt_date(sun), _fmt_date(mon), _fmt_date(tue)
 
 # ---------------- PDF builder ---------------- #
+# التخطيط ثابت (عنوان + جدول حقول + ثلاث كتل)، لذا نرسم مباشرة على Canvas
+# بدلاً من محرّك Platypus، مع الحفاظ على نفس أبعاد Table/Frame السابقة.
+
+# عروض الأعمدة (يسار ← يمين)
+_FIELDS_COL_W = (38*mm, 30*mm, 28*mm, 64*mm)
+_DATE_COL_W   = (40*mm, 20*mm)
+_VISIT_COL_W  = (60*mm, 60*mm, 25*mm, 25*mm)
+
+# خلايا الجداول: خط 11، تباعد أسطر 12 (14 لصف بيانات الزيارة)، حشوة 6 من كل جهة
+_CELL_FONT_SIZE = 11
+_CELL_LEADING   = 12
+_CELL_PAD       = 6
+_HEAD_BG = colors.whitesmoke
+
+
+class _Grid(NamedTuple):
+    col_widths: tuple
+    rows: list                # صفوف من نصوص مُشكَّلة، الأعمدة يسار ← يمين
+    leadings: tuple           # تباعد الأسطر لكل صف
+    valign: str               # "MIDDLE" أو "TOP"
+    shaded: tuple             # أعمدة الصف الأول ذات الخلفية
+
+    @property
+    def row_heights(self):
+        return [max(len(v.split("\n")) for v in row) * ld + 2 * _CELL_PAD
+                for row, ld in zip(self.rows, self.leadings)]
+
+
+def _draw_grid(canvas, font_name: str, grid: _Grid, y_top: float) -> float:
+    """يرسم الجدول ملاصقاً لحافة الإطار اليمنى ابتداءً من y_top، ويُعيد y أسفله."""
+    xs = [_BODY_RIGHT - sum(grid.col_widths)]
+    for w in grid.col_widths:
+        xs.append(xs[-1] + w)
+    ys = [y_top]
+    for h in grid.row_heights:
+        ys.append(ys[-1] - h)
+
+    # خلفية خلايا العنوان
+    canvas.setFillColor(_HEAD_BG)
+    for c in grid.shaded:
+        canvas.rect(xs[c], ys[1], xs[c+1] - xs[c], ys[0] - ys[1], stroke=0, fill=1)
+
+    # النصوص (محاذاة يمين؛ نطرح العرض المحفوظ بدلاً من drawRightString)
+    canvas.setFillColor(colors.black)
+    for r, (row, ld) in enumerate(zip(grid.rows, grid.leadings)):
+        canvas.setFont(font_name, _CELL_FONT_SIZE, ld)
+        top, bottom = ys[r], ys[r+1]
+        for c, val in enumerate(row):
+            if not val:
+                continue
+            lines = val.split("\n")
+            if grid.valign == "TOP":
+                y = top - _CELL_PAD - _CELL_FONT_SIZE
+            else:
+                y = (top + bottom + len(lines) * ld) / 2 - _CELL_FONT_SIZE
+            x = xs[c+1] - _CELL_PAD
+            for ln in lines:
+                canvas.drawString(x - _text_width(ln, font_name, _CELL_FONT_SIZE), y, ln)
+                y -= ld
+
+    # الشبكة
+    canvas.saveState()
+    canvas.setLineWidth(1)
+    canvas.setLineCap(1)
+    canvas.setLineJoin(1)
+    canvas.setStrokeColor(colors.black)
+    canvas.grid(xs, ys)
+    canvas.restoreState()
+    return ys[-1]
+
+
+def _split_grid(grid: _Grid, room: float) -> tuple[Optional[_Grid], _Grid]:
+    """يقسم الجدول عند ارتفاع room كما يفعل Table في Platypus: بين الصفوف، ويبقى الباقي
+    للصفحة التالية. الصف الأطول من صفحة كاملة يُقسم على أسطره، ويتكرّر صف العنوان قبل
+    تكملته. يُعيد (None, grid) إن لم يتّسع شيء."""
+    heights = grid.row_heights
+    k, used = 0, 0.0
+    while used + heights[k] <= room:
+        used += heights[k]
+        k += 1
+    rest_shaded = grid.shaded if k == 0 else ()
+    # الصف الأول عنوان ما دام مظلّلاً (التكملة بلا عنوان لا تُظلَّل)
+    carry = k > 0 and bool(grid.shaded)
+    header = heights[0] if carry else 0
+    if header + heights[k] <= _BODY_TOP - _BODY_BOTTOM:
+        if not k:
+            return None, grid
+        head = grid._replace(rows=grid.rows[:k], leadings=grid.leadings[:k])
+        return head, grid._replace(rows=grid.rows[k:], leadings=grid.leadings[k:], shaded=rest_shaded)
+
+    ld = grid.leadings[k]
+    n = int((room - used - 2 * _CELL_PAD) // ld)
+    if n < 1:
+        return None, grid
+    cells = [v.split("\n") for v in grid.rows[k]]
+    first = ["\n".join(ln[:n]) for ln in cells]
+    second = ["\n".join(ln[n:]) for ln in cells]
+    head = grid._replace(rows=[*grid.rows[:k], first], leadings=grid.leadings[:k + 1])
+    if carry:
+        rest = grid._replace(rows=[grid.rows[0], second, *grid.rows[k + 1:]],
+                             leadings=(grid.leadings[0], *grid.leadings[k:]))
+    else:
+        rest = grid._replace(rows=[second, *grid.rows[k + 1:]], leadings=grid.leadings[k:],
+                             shaded=rest_shaded)
+    return head, rest
 
-def _fields_row(font_name: str, admin_name: str, period: str, week: str, term: str):
-    """صف حقول المعلومات الأساسية: اسم الإدارية (ثابت) + الحصة/الأسبوع/الفصل (من المدخلات)
+
+def _fields_row(admin_name_rtl: str, period: str, week: str, term: str) -> _Grid:
+    """صف حقول المعلومات الأساسية: اسم الإدارية (ثابت، مُشكَّل مسبقاً) + الحصة/الأسبوع/الفصل (من المدخلات)
     نرتّب الأعمدة لتظهر من اليمين لليسار بصرياً (اسم الإدارية في أقصى اليمين)."""
     # رتب العناوين والقيم لتظهر RTL: [يسار ← يمين]
-    headers = [rtl("الفصل الدراسي"), rtl("الأسبوع"), rtl("الحصة"), rtl("اسم الإدارية")]
-    values  = [rtl(term or ""), rtl(week or ""), rtl(period or ""), rtl(admin_name)]
-    widths = [38*mm, 30*mm, 28*mm, 64*mm]
-
-    t = Table([headers, values], colWidths=widths, hAlign="RIGHT")
-    t.setStyle(TableStyle([
-        ("FONT", (0,0), (-1,-1), font_name),
-        ("FONTSIZE", (0,0), (-1,-1), 11),
-        ("GRID", (0,0), (-1,-1), 1, colors.black),
-        ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
-        ("ALIGN", (0,0), (-1,-1), "RIGHT"),
-        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 6),
-        ("TOPPADDING", (0,0), (-1,-1), 6),
-    ]))
-    return t
-
-
-def _date_row(font_name: str, date_str: str):
+    values  = [*rtl_many(term, week, period), admin_name_rtl]
+    return _Grid(_FIELDS_COL_W, [_FIELDS_HEADERS_RTL, values],
+                 (_CELL_LEADING, _CELL_LEADING), "MIDDLE", (0, 1, 2, 3))
+
+
+def _date_row(date_str: str) -> _Grid:
     # لكي يكون "التاريخ" على يمين الجدول بصرياً: [يسار القيمة | يمين العنوان]
-    t = Table([[rtl(date_str), rtl("التاريخ")]], colWidths=[40*mm, 20*mm], hAlign="RIGHT")
-    t.setStyle(TableStyle([
-        ("FONT", (0,0), (-1,-1), font_name),
-        ("FONTSIZE", (0,0), (-1,-1), 11),
-        ("GRID", (0,0), (-1,-1), 1, colors.black),
-        ("BACKGROUND", (1,0), (1,0), colors.whitesmoke),  # خلية العنوان
-        ("ALIGN", (0,0), (-1,-1), "RIGHT"),
-        ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 6),
-        ("TOPPADDING", (0,0), (-1,-1), 6),
-    ]))
-    return t
-
-
-def _visit_table(font_name: str, day_label: str, klass: str, follow: str, note: str):
+    return _Grid(_DATE_COL_W, [[rtl(date_str), _DATE_LABEL_RTL]],
+                 (_CELL_LEADING,), "MIDDLE", (1,))
+
+
+def _visit_table(day_rtl: str, klass: str, follow: str, note: str) -> _Grid:
     """جدول: اليوم | الفصل | متابعة الجولة | ملاحظات
     نمرّر البيانات معكوسة الأعمدة ليظهر بصرياً RTL (اليوم أقصى اليمين)."""
     # ترتيب الأعمدة في data هو من اليسار لليمين بصرياً، لذا نضعها بالعكس
-    head = [rtl("ملاحظات"), rtl("متابعة الجولة"), rtl("الفصل"), rtl("اليوم")]
-    row  = [rtl(note or ""), rtl(follow or ""), rtl(klass or ""), rtl(day_label)]
-    widths = [60*mm, 60*mm, 25*mm, 25*mm]
-    t = Table([head, row], colWidths=widths, hAlign="RIGHT")
-    t.setStyle(TableStyle([
-        ("FONT", (0,0), (-1,-1), font_name),
-        ("FONTSIZE", (0,0), (-1,-1), 11),
-        ("GRID", (0,0), (-1,-1), 1, colors.black),
-        ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
-        ("ALIGN", (0,0), (-1,-1), "RIGHT"),
-        ("VALIGN", (0,0), (-1,-1), "TOP"),
-        ("BOTTOMPADDING", (0,0), (-1,-1), 6),
-        ("TOPPADDING", (0,0), (-1,-1), 6),
-        ("LEADING", (0,1), (-1,-1), 14),
-    ]))
-    return t
+    row  = [*rtl_many(note, follow, klass), day_rtl]
+    return _Grid(_VISIT_COL_W, [_VISIT_HEADERS_RTL, row],
+                 (_CELL_LEADING, 14), "TOP", (0, 1, 2, 3))
 
 
 def build_pdf_report(period: str, week: str, term: str,
                      sun_class: str, sun_follow: str, sun_note: str,
                      mon_class: str, mon_follow: str, mon_note: str,
-                     tue_class: str, tue_follow: str, tue_note: str) -> bytes:
+                     tue_class: str, tue_follow: str, tue_note: str,
+                     now: Optional[datetime] = None) -> bytes:
 
-    font_regular, font_bold = ensure_fonts(FONT_REGULAR_PATH, FONT_BOLD_PATH)
+    font_regular, font_bold = FONT_REGULAR, FONT_BOLD
 
-    styles = getSampleStyleSheet()
-    h1 = ParagraphStyle(
-        "H1", parent=styles["Heading1"], fontName=font_bold,
-        alignment=TA_CENTER, fontSize=16, leading=22, spaceAfter=8
-    )
+    # تواريخ الأسبوع الحالي (الأحد → الثلاثاء)
+    sun_d, mon_d, tue_d = current_week_sun_mon_tue(now)
+
+    # عناصر الصفحة بالترتيب: جدول أو فراغ عمودي
+    blocks = [
+        # صف الحقول (اسم الإدارية ثابت)
+        _fields_row(_ADMIN_NAME_RTL, period, week, term), _GAP_M,
+        # الكتلة 1: الأحد
+        _date_row(sun_d), _GAP_S,
+        _visit_table(_DAYS_RTL[0], sun_class, sun_follow, sun_note), _GAP_L,
+        # الكتلة 2: الإثنين
+        _date_row(mon_d), _GAP_S,
+        _visit_table(_DAYS_RTL[1], mon_class, mon_follow, mon_note), _GAP_L,
+        # الكتلة 3: الثلاثاء
+        _date_row(tue_d), _GAP_S,
+        _visit_table(_DAYS_RTL[2], tue_class, tue_follow, tue_note),
+    ]
 
     buf = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buf, pagesize=A4,
-        rightMargin=15*mm, leftMargin=15*mm,
-        topMargin=55*mm, bottomMargin=25*mm
-    )
+    c = Canvas(buf, pagesize=A4)
+    draw_header_footer(c, font_regular)
 
-    story = []
     # العنوان المطابق
-    story.append(Paragraph(rtl("تقرير الجولات الإدارية عبر منصة مدرستي"), h1))
-    story.append(Spacer(1, 4*mm))
-
-    # صف الحقول (اسم الإدارية ثابت)
-    admin_name = "ابتسام قاسم الفيفي"
-    story.append(_fields_row(font_regular, admin_name, period, week, term))
-    story.append(Spacer(1, 6*mm))
-
-    # تواريخ الأسبوع الحالي (الأحد → الثلاثاء)
-    sun_d, mon_d, tue_d = current_week_sun_mon_tue()
-
-    # الكتلة 1: الأحد
-    story.append(_date_row(font_regular, sun_d))
-    story.append(Spacer(1, 4*mm))
-    story.append(_visit_table(font_regular, "الأحد", sun_class, sun_follow, sun_note))
-    story.append(Spacer(1, 8*mm))
-
-    # الكتلة 2: الإثنين
-    story.append(_date_row(font_regular, mon_d))
-    story.append(Spacer(1, 4*mm))
-    story.append(_visit_table(font_regular, "الإثنين", mon_class, mon_follow, mon_note))
-    story.append(Spacer(1, 8*mm))
-
-    # الكتلة 3: الثلاثاء
-    story.append(_date_row(font_regular, tue_d))
-    story.append(Spacer(1, 4*mm))
-    story.append(_visit_table(font_regular, "الثلاثاء", tue_class, tue_follow, tue_note))
-    story.append(Spacer(1, 10*mm))
-
-    def on_page(canvas, doc_obj):
-        draw_header_footer(canvas, doc_obj, font_regular)
-
-    doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
-    pdf_bytes = buf.getvalue()
-    buf.close()
-    return pdf_bytes
+    y = _BODY_TOP
+    c.setFont(font_bold, _TITLE_SIZE, _TITLE_LEADING)
+    c.drawString(_BODY_CX - _text_width(_TITLE_RTL, font_bold, _TITLE_SIZE) / 2,
+                 y - _TITLE_SIZE, _TITLE_RTL)
+    y -= _TITLE_LEADING + _TITLE_SPACE_AFTER + _GAP_S
+
+    for blk in blocks:
+        if not isinstance(blk, _Grid):
+            y -= blk
+            continue
+        # ما لا يتّسع (ملاحظات طويلة متعددة الأسطر) يُقسم ويُكمل في صفحة جديدة
+        while y - sum(blk.row_heights) < _BODY_BOTTOM:
+            head, blk = _split_grid(blk, y - _BODY_BOTTOM)
+            if head is not None:
+                _draw_grid(c, font_regular, head, y)
+            elif y == _BODY_TOP:
+                raise LayoutError("خلية لا يتّسع سطر واحد منها في صفحة كاملة")
+            c.showPage()
+            draw_header_footer(c, font_regular)
+            y = _BODY_TOP
+        y = _draw_grid(c, font_regular, blk, y)
+
+    c.showPage()
+    c.save()
+    # getvalue() يشارك مخزن BytesIO دون نسخ، و Response يمرّر bytes كما هي
+    return buf.getvalue()
+
+# كل الذاكرات المؤقتة (الخطوط، النصوص المُشكَّلة، عروض النصوص) تُبنى عند الاستيراد.
+# بناء تقرير فارغ هنا يُكمل ما تبقّى من تهيئة ReportLab الكسولة، فتتشاركها العمليات
+# المتفرّعة عند التشغيل بـ gunicorn --preload (uvicorn --workers يُنشئ عملياته بـ spawn
+# فتعيد كلٌّ منها الاستيراد).
+build_pdf_report(*[""] * 12)
 
 # ---------------- Routes ---------------- #
 
@@ -244,13 +473,17 @@ async def generate_pdf(
     # Tuesday inputs
     tue_class: str  = Form("") , tue_follow: str = Form(""), tue_note: str = Form("")
 ):
-    pdf_bytes = build_pdf_report(
+    # وقت واحد للتواريخ واسم الملف
+    now = datetime.now()
+    # البناء متزامن وثقيل على المعالج؛ ننفّذه في خيط حتى لا تتوقف حلقة الأحداث
+    pdf_bytes = await asyncio.to_thread(
+        build_pdf_report,
         period, week, term,
         sun_class, sun_follow, sun_note,
         mon_class, mon_follow, mon_note,
         tue_class, tue_follow, tue_note,
+        now,
     )
-    from urllib.parse import quote
-    filename = quote(f"تقرير_الجولات_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
+    filename = quote(f"تقرير_الجولات_{now:%Y%m%d_%H%M%S}.pdf")
     headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"}
     return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
@@ -0,0 +1,64 @@
+"""تقسيم الجداول على الصفحات: لا نص خارج إطار المحتوى ولا أسطر مفقودة."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "server"))
+import app  # noqa: E402
+
+
+class _RecordingCanvas(app.Canvas):
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.page, self.strings, self.grids = 1, [], []
+        _RecordingCanvas.last = self
+
+    def drawString(self, x, y, text, *a, **kw):
+        self.strings.append((self.page, y, text))
+        return super().drawString(x, y, text, *a, **kw)
+
+    def drawRightString(self, x, y, text, *a, **kw):
+        self.strings.append((self.page, y, text))
+        return super().drawRightString(x, y, text, *a, **kw)
+
+    def grid(self, xs, ys):
+        self.grids.append((self.page, min(ys), max(ys)))
+        return super().grid(xs, ys)
+
+    def showPage(self):
+        self.page += 1
+        return super().showPage()
+
+
+def _build(monkeypatch, **fields):
+    monkeypatch.setattr(app, "Canvas", _RecordingCanvas)
+    args = dict.fromkeys(
+        ("period week term sun_class sun_follow sun_note mon_class mon_follow mon_note "
+         "tue_class tue_follow tue_note").split(), "")
+    args.update(fields)
+    pdf = app.build_pdf_report(**args)
+    assert pdf.startswith(b"%PDF")
+    return _RecordingCanvas.last
+
+
+@pytest.mark.parametrize("fields", [
+    {"sun_note": "\n".join(f"ملاحظة {i}" for i in range(80))},
+    {"sun_note": "\n".join(f"ملاحظة {i}" for i in range(200)), "sun_class": "\n".join(["٣/١"] * 130)},
+    {"mon_note": "\n".join(["n"] * 60), "tue_follow": "\n".join(["تمت"] * 60)},
+    {"term": "\n".join(["الأول"] * 80)},
+])
+def test_oversized_rows_split_across_pages(monkeypatch, fields):
+    c = _build(monkeypatch, **fields)
+    page_chrome = {*app._HDR_RIGHT_RTL, app._FOOTER_RTL}
+    body = [(p, y, t) for p, y, t in c.strings if t not in page_chrome]
+    assert all(app._BODY_BOTTOM <= y <= app._BODY_TOP for _, y, _ in body)
+    assert all(lo >= app._BODY_BOTTOM - 1e-6 and hi <= app._BODY_TOP + 1e-6 for _, lo, hi in c.grids)
+    drawn = [t for _, _, t in body]
+    for value in fields.values():
+        lines = value.split("\n")
+        assert sum(drawn.count(app.rtl(ln)) for ln in set(lines)) == len(lines)
+    # صف العنوان يتكرّر في كل صفحة تكملة
+    pages = {p for p, _, _ in body}
+    assert len(pages) > 1
+    assert {p for p, _, t in body if t in (app._VISIT_HEADERS_RTL[0], app._FIELDS_HEADERS_RTL[0])} == pages